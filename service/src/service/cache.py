@@ -0,0 +1,96 @@
+"""In-memory caches shared across requests."""
+
+import asyncio
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Hashable
+from typing import Any, Generic, TypeVar
+
+import orjson
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+def key_bytes(value: Any) -> bytes:
+    """Serialize a value for use in a cache key, whatever the values in it."""
+    try:
+        return orjson.dumps(value, default=str, option=orjson.OPT_SORT_KEYS)
+    except TypeError:
+        # orjson rejects integers wider than 64 bits even with a default
+        return repr(value).encode()
+
+
+class LRUCache(Generic[K, V]):
+    """Bounded mapping that evicts the least recently used entry when full."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._entries: OrderedDict[K, V] = OrderedDict()
+
+    def get(self, key: K) -> V | None:
+        """Return the cached value for key, or None if it is not cached."""
+        if key not in self._entries:
+            return None
+        self._entries.move_to_end(key)
+        return self._entries[key]
+
+    def set(self, key: K, value: V) -> None:
+        """Cache value under key, evicting the oldest entry if needed."""
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class TTLCache(Generic[K, V]):
+    """LRU cache whose entries additionally expire ttl seconds after being set."""
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        self.ttl = ttl
+        self._entries: LRUCache[K, tuple[float, V]] = LRUCache(maxsize)
+
+    def get(self, key: K) -> V | None:
+        """Return the cached value for key, or None if it is missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            return None
+        return value
+
+    def set(self, key: K, value: V) -> None:
+        self._entries.set(key, (time.monotonic() + self.ttl, value))
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SingleFlight(Generic[K, V]):
+    """Coalesce concurrent calls with the same key into a single execution.
+
+    Callers arriving while a call for their key is in flight await its result
+    instead of starting another one. Nothing is kept once the call completes.
+    """
+
+    def __init__(self) -> None:
+        self._in_flight: dict[K, asyncio.Future[V]] = {}
+
+    async def run(self, key: K, call: Callable[[], Awaitable[V]]) -> V:
+        future = self._in_flight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(call())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # Shielded so one caller being cancelled does not cancel the others
+        return await asyncio.shield(future)
@@ -0,0 +1,187 @@
+"""Chart rendering that runs inside the chart worker processes.
+
+Generated chart code only ever runs here, in worker processes spawned without
+the service's state or secrets. The restricted builtins merely keep well-meant
+chart code on track; they are not a sandbox, since the allowed libraries still
+reach the os module.
+"""
+
+import builtins
+import contextlib
+import faulthandler
+import io
+import os
+import signal
+import warnings
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+# Results smaller than this are charted as-is, without numeric coercion
+_MIN_COERCION_CELLS = 64
+
+_FIGURE_SIZE = (8, 6)
+# Screen resolution and fast zlib level; PNGs are slightly larger but encode faster
+_CHART_DPI = 96
+_PNG_COMPRESS_LEVEL = 1
+
+# Environment variables the worker keeps; everything else (tokens, settings) goes
+_WORKER_ENVIRON = frozenset(
+    {"HOME", "LANG", "LC_ALL", "MPLCONFIGDIR", "PATH", "TMPDIR"}
+)
+
+# Top-level packages chart code may import
+_ALLOWED_MODULES = frozenset(
+    {"collections", "datetime", "itertools", "math", "matplotlib", "numpy", "pandas"}
+)
+
+_BLOCKED_BUILTINS = frozenset(
+    {
+        "breakpoint",
+        "compile",
+        "eval",
+        "exec",
+        "exit",
+        "globals",
+        "help",
+        "input",
+        "locals",
+        "open",
+        "quit",
+        "vars",
+    }
+)
+
+# Chart code stuck in native code never sees the timeout alarm; the worker
+# exits this long after the timeout instead
+_EXIT_GRACE_SECONDS = 5
+
+
+class RenderTimeoutError(Exception):
+    """Raised inside a worker when chart code runs past its timeout."""
+
+
+def _raise_timeout(signum: int, frame: object) -> None:
+    raise RenderTimeoutError("Chart code timed out")
+
+
+def _restricted_import(
+    name: str,
+    globals: dict | None = None,
+    locals: dict | None = None,
+    fromlist: tuple = (),
+    level: int = 0,
+):
+    if level != 0 or name.partition(".")[0] not in _ALLOWED_MODULES:
+        raise ImportError(f"Import of '{name}' is not allowed in chart code")
+    return builtins.__import__(name, globals, locals, fromlist, level)
+
+
+_SAFE_BUILTINS = {
+    name: value
+    for name, value in vars(builtins).items()
+    if name not in _BLOCKED_BUILTINS
+}
+_SAFE_BUILTINS["__import__"] = _restricted_import
+
+
+def init_worker() -> None:
+    """Prepare a freshly spawned worker: scrub its environment and warm up pyplot."""
+    for key in list(os.environ):
+        if key not in _WORKER_ENVIRON:
+            del os.environ[key]
+
+    signal.signal(signal.SIGALRM, _raise_timeout)
+    plt.switch_backend("Agg")
+    plt.close(plt.figure(figsize=_FIGURE_SIZE))
+
+
+def ping() -> None:
+    """No-op task used to start and warm up the workers."""
+
+
+def _prepare_dataframe(headers: list, rows: list) -> pd.DataFrame:
+    """Create a DataFrame from the SQL result and clean it for chart generation."""
+    df = pd.DataFrame(rows, columns=headers)
+    if df.size < _MIN_COERCION_CELLS:
+        return df
+
+    # Convert text columns to numeric when more than 50% of values parse as numbers
+    object_columns = df.select_dtypes(include="object").columns
+    if len(object_columns):
+        coerced = df[object_columns].apply(pd.to_numeric, errors="coerce")
+        numeric_mask = coerced.notna().mean() > 0.5
+        numeric_columns = numeric_mask.index[numeric_mask]
+        if len(numeric_columns):
+            df[numeric_columns] = coerced[numeric_columns].fillna(0)
+
+    return df
+
+
+def render_chart(chart_code: str, headers: list, rows: list, timeout: float) -> bytes:
+    """Execute the generated chart code on the query result and return PNG bytes.
+
+    Raises RenderTimeoutError once the render takes longer than timeout seconds.
+    """
+    signal.setitimer(signal.ITIMER_REAL, timeout)
+    faulthandler.dump_traceback_later(timeout + _EXIT_GRACE_SECONDS, exit=True)
+    try:
+        return _render(chart_code, headers, rows)
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        faulthandler.cancel_dump_traceback_later()
+
+
+def _render(chart_code: str, headers: list, rows: list) -> bytes:
+    # Workers serve many requests: chart code must not leave matplotlib or
+    # pandas settings, or figures, behind for the next one
+    try:
+        with plt.rc_context():
+            return _render_figure(chart_code, headers, rows)
+    finally:
+        plt.close("all")
+        with warnings.catch_warnings():
+            # Resetting deprecated options warns about them
+            warnings.simplefilter("ignore", FutureWarning)
+            pd.reset_option("all")
+
+
+def _render_figure(chart_code: str, headers: list, rows: list) -> bytes:
+    df = _prepare_dataframe(headers, rows)
+    fig = plt.figure(figsize=_FIGURE_SIZE)
+    namespace = {
+        "__builtins__": _SAFE_BUILTINS,
+        "df": df,
+        "fig": fig,
+        "plt": plt,
+        "pd": pd,
+        "np": np,
+        "headers": headers,
+        "rows": rows,
+    }
+
+    if df.empty:
+        plt.text(0.5, 0.5, "No data available", ha="center", va="center", fontsize=16)
+        plt.xlim(0, 1)
+        plt.ylim(0, 1)
+        plt.title("No Data Available")
+    else:
+        # Discard anything the generated chart code prints
+        with contextlib.redirect_stdout(io.StringIO()):
+            # Runs in a worker process without secrets and under a timeout
+            exec(chart_code, namespace)  # noqa: S102
+
+    # The chart code may still open its own figure via plt.figure(); render
+    # whatever is current.
+    buffer = io.BytesIO()
+    plt.gcf().savefig(
+        buffer,
+        format="png",
+        dpi=_CHART_DPI,
+        bbox_inches="tight",
+        facecolor="white",
+        edgecolor="none",
+        pil_kwargs={"compress_level": _PNG_COMPRESS_LEVEL},
+    )
+    return buffer.getvalue()
@@ -1,142 +1,190 @@
 """Chart generation service."""
 
+import asyncio
 import base64
 import hashlib
-import os
-import subprocess
-import sys
-import tempfile
-import uuid
+import multiprocessing
+import re
+from concurrent.futures import Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
 from typing import List
 
+
+from service.cache import LRUCache, key_bytes
+from service.chart_renderer import init_worker, ping, render_chart
 from service.kernel import Kernel, KernelException, Skill
 from service.logging_config import logger
 
-
-def _generate_unique_chart_id(query: str, headers: list, rows: list) -> str:
-    """Generate a unique identifier for the chart based on query and data."""
-    query_hash = hashlib.md5(
-        f"{query}_{str(headers)}_{str(rows)}".encode()
-    ).hexdigest()[:8]
-    return f"chart_{query_hash}_{uuid.uuid4().hex[:8]}"
-
-
-def _create_data_preparation_code(headers: list, rows: list) -> str:
-    """Create Python code to prepare and clean the data for chart generation."""
-    return f"""
-import pandas as pd
-import numpy as np
-
-# Data from SQL query
-headers = {headers}
-rows = {rows}
-
-# Create DataFrame and clean data
-df = pd.DataFrame(rows, columns=headers)
-
-# Simple data cleaning - convert columns to appropriate types
-for col in df.columns:
-    if df[col].dtype == 'object':
-        # Try to convert to numeric, but keep as string if it fails
-        numeric_series = pd.to_numeric(df[col], errors='coerce')
-        # Only convert if most values are successfully converted to numbers
-        if not numeric_series.isna().all():
-            # Check if it looks like it should be numeric (more than 50% converted successfully)
-            if (numeric_series.notna().sum() / len(df)) > 0.5:
-                df[col] = numeric_series.fillna(0)
-
-print(f"DataFrame shape after cleaning: {{df.shape}}")
-print(f"DataFrame dtypes: {{df.dtypes.to_dict()}}")
-print(f"DataFrame head: {{df.head().to_dict()}}")
-"""
-
-
-def _create_chart_execution_code(
-    chart_code: str, chart_uuid: str, temp_dir: str
-) -> str:
-    """Create the complete Python code to execute chart generation."""
-    return f"""
-import sys
-sys.path.append({repr(temp_dir)})
-import matplotlib
-matplotlib.use('Agg')  # Use non-interactive backend for server-side generation
-import matplotlib.pyplot as plt
-import pandas as pd
-import numpy as np
-
-# Import the prepared data
-from data import df, headers, rows
-
-print("DataFrame loaded:")
-print(f"Shape: {{df.shape}}")
-print(f"Columns: {{df.columns.tolist()}}")
-print(f"Data types: {{df.dtypes.to_dict()}}")
-print("First few rows:")
-print(df.head())
-
-# Check if DataFrame is empty
-if df.empty:
-    print("DataFrame is empty, creating placeholder chart")
-    plt.figure(figsize=(8, 6))
-    plt.text(0.5, 0.5, 'No data available', ha='center', va='center', fontsize=16)
-    plt.xlim(0, 1)
-    plt.ylim(0, 1)
-    plt.title('No Data Available')
-else:
-    print("Generating chart with data")
-    {chart_code}
-
-# Save the chart with unique filename
-plt.savefig({repr(chart_uuid + '.png')}, dpi=150, bbox_inches='tight', facecolor='white', edgecolor='none')
-print(f"Chart saved as {chart_uuid}.png")
-plt.close()
-"""
-
-
-def _execute_chart_generation(
-    chart_file: str, temp_dir: str
-) -> subprocess.CompletedProcess:
-    """Execute the chart generation Python script."""
-    return subprocess.run(
-        [sys.executable, chart_file],
-        cwd=temp_dir,
-        capture_output=True,
-        text=True,
-        timeout=60,
-    )
+_CLASSIFIER_SKILL = Skill(namespace="playground", name="chart_classifier")
+_GENERATOR_SKILL = Skill(namespace="playground", name="chart_generator")
+_DEFAULT_CHART_TYPE = "bar"
+
+# A first column named like a point in time (Year, OrderDate, order_month, ...)
+# is a trend over time, which the classifier reliably answers with a line chart
+_TIME_COLUMN_RE = re.compile(
+    r"(?:^|[_\s]|(?<=[a-z])(?=[A-Z]))(?i:year|month|date|quarter|week|period)s?$"
+)
+_MIN_TREND_ROWS = 3
+
+# The classifier only looks at a sample of the result plus its total size
+_CLASSIFIER_SAMPLE_ROWS = 5
+
+# Chart code runs in a pool of pre-warmed worker processes, never in the API
+# process. Workers enforce the render timeout themselves; the deadline here is
+# a backstop that also covers spawning a replacement worker.
+_RENDER_WORKERS = 2
+_RENDER_TIMEOUT_SECONDS = 60
+_RENDER_DEADLINE_SECONDS = _RENDER_TIMEOUT_SECONDS + 30
+# Workers are replaced regularly so that state leaking past the per-render
+# resets cannot accumulate
+_RENDER_TASKS_PER_WORKER = 50
+# A worker that dies fails every render in its pool; those get one more try
+_RENDER_ATTEMPTS = 2
+
+_render_pool: ProcessPoolExecutor | None = None
+# Bounds submissions to idle workers so the timeout only covers execution
+_render_slots = asyncio.Semaphore(_RENDER_WORKERS)
+
+# Classifier decisions keyed by (query, headers)
+_chart_type_cache: LRUCache[tuple[str, tuple[str, ...]], str] = LRUCache(maxsize=1024)
+
+# Rendered charts (base64 PNG) keyed by a hash of query and data
+_chart_cache: LRUCache[str, str] = LRUCache(maxsize=128)
+
+
+def _chart_cache_key(query: str, headers: list, rows: list) -> str:
+    """Return a deterministic content hash of the query and its data."""
+    hasher = hashlib.blake2b(digest_size=16)
+    for part in (query.encode(), key_bytes(headers), key_bytes(rows)):
+        # Length-prefixed so that different splits of the same bytes differ
+        hasher.update(len(part).to_bytes(8, "big"))
+        hasher.update(part)
+    return hasher.hexdigest()
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    """Return the chart worker pool, creating it on first use."""
+    global _render_pool
+    if _render_pool is None:
+        # Spawned workers start clean instead of inheriting the service's memory
+        _render_pool = ProcessPoolExecutor(
+            max_workers=_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=init_worker,
+            max_tasks_per_child=_RENDER_TASKS_PER_WORKER,
+        )
+    return _render_pool
+
+
+def _warm_up(pool: ProcessPoolExecutor) -> list[Future]:
+    """Submit one no-op per worker so that every worker gets spawned."""
+    return [pool.submit(ping) for _ in range(_RENDER_WORKERS)]
+
+
+def start_render_pool() -> None:
+    """Start the chart workers and wait until all of them are warmed up."""
+    wait(_warm_up(_get_render_pool()))
+
+
+def shutdown_render_pool() -> None:
+    """Stop the chart workers, cancelling pending renders."""
+    global _render_pool
+    if _render_pool is not None:
+        _render_pool.shutdown(cancel_futures=True)
+        _render_pool = None
+
+
+def _discard_render_pool(pool: ProcessPoolExecutor) -> None:
+    """Drop a broken or stuck pool; a fresh one is started on the next render."""
+    global _render_pool
+    if _render_pool is pool:
+        _render_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+async def _ready_render_pool() -> ProcessPoolExecutor:
+    """Return the chart worker pool, warming up a fresh one before returning it."""
+    if _render_pool is None:
+        # Spawning takes a while and must not eat into a render's deadline
+        await asyncio.gather(*map(asyncio.wrap_future, _warm_up(_get_render_pool())))
+    return _get_render_pool()
+
+
+async def _render_chart(chart_code: str, headers: list, rows: list) -> bytes:
+    """Render the chart code in a worker process, enforcing the render timeout."""
+    async with _render_slots:
+        for attempt in range(1, _RENDER_ATTEMPTS + 1):
+            pool = await _ready_render_pool()
+            try:
+                future = pool.submit(
+                    render_chart, chart_code, headers, rows, _RENDER_TIMEOUT_SECONDS
+                )
+                return await asyncio.wait_for(
+                    asyncio.wrap_future(future), _RENDER_DEADLINE_SECONDS
+                )
+            except BrokenProcessPool:
+                _discard_render_pool(pool)
+                logger.warning(f"Chart worker died during render attempt {attempt}")
+            except TimeoutError:
+                _discard_render_pool(pool)
+                raise Exception(
+                    f"Chart code timed out after {_RENDER_TIMEOUT_SECONDS} seconds"
+                ) from None
+
+    raise Exception("Chart worker died while rendering")
+
+
+def _heuristic_chart_type(headers: list, rows: list) -> str | None:
+    """Return the chart type for results whose shape makes it obvious, else None."""
+    if (
+        len(headers) >= 2
+        and len(rows) >= _MIN_TREND_ROWS
+        and _TIME_COLUMN_RE.search(str(headers[0]).strip())
+    ):
+        return "line"
+    return None
+
+
+def chart_classifier_input(query: str, headers: list, rows: list) -> dict:
+    """Build the chart classifier skill input, sending only a sample of the rows."""
+    return {
+        "query": query,
+        "headers": headers,
+        "rows": rows[:_CLASSIFIER_SAMPLE_ROWS],
+        "total_rows": len(rows),
+    }
 
 
-async def _generate_chart_code(
+async def _classify_chart_type(
     kernel: Kernel, token: str, query: str, headers: list, rows: list
 ) -> str:
-    """Use AI to determine chart type and generate Python chart code based on the data."""
-    logger.info(f"Chart generation step 1: Classifying chart type for {len(rows)} rows")
-    logger.debug(f"Headers: {headers}")
-
-    # Step 1: Classify the chart type
-    classifier_skill = Skill(namespace="playground", name="chart_classifier")
-    classifier_input = {"query": query, "headers": headers, "rows": rows}
+    """Ask the chart classifier skill for a chart type, falling back to bar."""
+    classifier_input = chart_classifier_input(query, headers, rows)
 
     try:
         classifier_response = await kernel.run(
-            classifier_skill, token, classifier_input
+            _CLASSIFIER_SKILL, token, classifier_input
         )
         chart_type = classifier_response.get("chart_type")
 
         if not chart_type:
             logger.warning("Chart classification failed, defaulting to bar chart")
-            chart_type = "bar"
+            return _DEFAULT_CHART_TYPE
 
         logger.info(f"Chart type classified as: {chart_type.upper()}")
+        _chart_type_cache.set((query, tuple(headers)), chart_type)
+        return chart_type
 
     except KernelException as exp:
         logger.error(f"Chart classifier skill error: {exp}")
         logger.warning("Using default chart type: bar")
-        chart_type = "bar"
+        return _DEFAULT_CHART_TYPE
 
-    # Step 2: Generate chart code based on the classified type
-    logger.info(f"Chart generation step 2: Generating {chart_type} chart code")
-    generator_skill = Skill(namespace="playground", name="chart_generator")
+
+async def _request_chart_code(
+    kernel: Kernel, token: str, chart_type: str, query: str, headers: list, rows: list
+) -> str:
+    """Ask the chart generator skill for Python code drawing the given chart type."""
     generator_input = {
         "chart_type": chart_type,
         "query": query,
@@ -145,23 +193,83 @@ async def _generate_chart_code(
     }
 
     try:
-        generator_response = await kernel.run(generator_skill, token, generator_input)
-        chart_code = generator_response.get("chart_code")
+        generator_response = await kernel.run(_GENERATOR_SKILL, token, generator_input)
+    except KernelException as exp:
+        logger.error(f"Chart generator skill error: {exp}")
+        raise Exception("Chart generation skill not available") from exp
 
-        if not chart_code:
-            logger.error("No chart code returned from generator skill")
-            raise Exception("Failed to generate chart code")
+    chart_code = generator_response.get("chart_code")
+    if not chart_code:
+        logger.error("No chart code returned from generator skill")
+        raise Exception("Failed to generate chart code")
 
-        code_lines = len(chart_code.split("\n"))
-        logger.info(
-            f"Chart code generated successfully: {code_lines} lines of Python code"
+    return chart_code
+
+
+def _discard(task: asyncio.Task) -> None:
+    """Cancel a task whose result is no longer needed, consuming any exception."""
+    if task.done():
+        if not task.cancelled():
+            task.exception()
+    else:
+        task.cancel()
+
+
+async def _classify_and_request_chart_code(
+    kernel: Kernel, token: str, query: str, headers: list, rows: list
+) -> str:
+    """Classify the chart type and request its code, speculating on the default."""
+    # Classification and code generation for the default chart type run
+    # concurrently; the speculative result is used when the types agree.
+    classifier_task = asyncio.create_task(
+        _classify_chart_type(kernel, token, query, headers, rows)
+    )
+    speculative_task = asyncio.create_task(
+        _request_chart_code(kernel, token, _DEFAULT_CHART_TYPE, query, headers, rows)
+    )
+
+    try:
+        chart_type = await classifier_task
+    except BaseException:
+        _discard(speculative_task)
+        raise
+
+    logger.info(f"Chart generation step 2: Generating {chart_type} chart code")
+    if chart_type == _DEFAULT_CHART_TYPE:
+        return await speculative_task
+
+    _discard(speculative_task)
+    return await _request_chart_code(kernel, token, chart_type, query, headers, rows)
+
+
+async def _generate_chart_code(
+    kernel: Kernel, token: str, query: str, headers: list, rows: list
+) -> str:
+    """Use AI to determine chart type and generate Python chart code based on the data."""
+    logger.info(f"Chart generation step 1: Classifying chart type for {len(rows)} rows")
+    logger.debug("Headers: {}", headers)
+
+    chart_type = _heuristic_chart_type(headers, rows)
+    if chart_type is not None:
+        logger.info(f"Chart type inferred from data: {chart_type.upper()}")
+    elif (chart_type := _chart_type_cache.get((query, tuple(headers)))) is not None:
+        logger.info(f"Chart type served from cache: {chart_type.upper()}")
+
+    if chart_type is not None:
+        logger.info(f"Chart generation step 2: Generating {chart_type} chart code")
+        chart_code = await _request_chart_code(
+            kernel, token, chart_type, query, headers, rows
+        )
+    else:
+        chart_code = await _classify_and_request_chart_code(
+            kernel, token, query, headers, rows
         )
-        logger.debug(f"Code preview: {chart_code[:150]}...")
 
-        return chart_code
-    except KernelException as exp:
-        logger.error(f"Chart generator skill error: {exp}")
-        raise Exception("Chart generation skill not available") from exp
+    code_lines = len(chart_code.split("\n"))
+    logger.info(f"Chart code generated successfully: {code_lines} lines of Python code")
+    logger.opt(lazy=True).debug("Code preview: {}...", lambda: chart_code[:150])
+
+    return chart_code
 
 
 async def generate_chart_image(
@@ -176,75 +284,35 @@ async def generate_chart_image(
     logger.info(
         f"Chart generation started for query with {len(rows)} rows and {len(headers)} columns"
     )
-    logger.debug(f"Headers: {headers}")
-    logger.debug(f"Sample rows: {rows[:3] if rows else 'No rows'}")
+    logger.debug("Headers: {}", headers)
+    logger.opt(lazy=True).debug(
+        "Sample rows: {}", lambda: rows[:3] if rows else "No rows"
+    )
+
+    cache_key = _chart_cache_key(query, headers, rows)
+    if (cached_chart := _chart_cache.get(cache_key)) is not None:
+        logger.info("Chart served from cache")
+        return cached_chart
 
     chart_code = await _generate_chart_code(kernel, token, query, headers, rows)
-    chart_uuid = _generate_unique_chart_id(query, headers, rows)
 
-    logger.debug(f"Chart UUID generated: {chart_uuid}")
+    try:
+        logger.info("Chart generation step 3: Executing chart code")
+        img_data = await _render_chart(chart_code, headers, rows)
+        img_size_kb = len(img_data) / 1024
+        logger.debug("PNG image size: {:.2f} KB", img_size_kb)
 
-    with tempfile.TemporaryDirectory() as temp_dir:
-        logger.debug(f"Using temp directory: {temp_dir}")
+        logger.info("Chart generation step 4: Encoding image to base64")
+        img_base64 = base64.b64encode(img_data).decode("ascii")
+        logger.debug("Base64 encoded size: {:.2f} KB", len(img_base64) / 1024)
 
-        data_file = os.path.join(temp_dir, "data.py")
-        chart_file = os.path.join(temp_dir, "chart.py")
-        output_image = os.path.join(temp_dir, f"{chart_uuid}.png")
+        logger.info(
+            f"Chart image generation completed successfully: {img_size_kb:.2f}KB PNG"
+        )
 
-        logger.info("Chart generation step 3: Creating data preparation code")
-        data_code = _create_data_preparation_code(headers, rows)
-        with open(data_file, "w") as f:
-            f.write(data_code)
-        logger.debug(f"Created data.py ({len(data_code)} bytes)")
+        _chart_cache.set(cache_key, img_base64)
+        return img_base64
 
-        logger.info("Chart generation step 4: Creating chart execution code")
-        complete_chart_code = _create_chart_execution_code(
-            chart_code, chart_uuid, temp_dir
-        )
-        with open(chart_file, "w") as f:
-            f.write(complete_chart_code)
-        logger.debug(f"Created chart.py ({len(complete_chart_code)} bytes)")
-
-        try:
-            logger.info(
-                "Chart generation step 5: Executing chart generation Python script"
-            )
-            result = _execute_chart_generation(chart_file, temp_dir)
-
-            if result.returncode != 0:
-                logger.error("Chart generation script execution failed")
-                logger.error(f"stderr: {result.stderr}")
-                logger.debug(f"stdout: {result.stdout}")
-                raise Exception(f"Chart generation failed: {result.stderr}")
-
-            logger.info("Chart generation script executed successfully")
-            logger.debug(f"Script stdout: {result.stdout}")
-            logger.debug(f"Files created in temp dir: {os.listdir(temp_dir)}")
-
-            if not os.path.exists(output_image):
-                logger.error(f"Chart image file not found at path: {output_image}")
-                raise Exception("Chart image was not generated")
-
-            logger.info("Chart generation step 6: Encoding image to base64")
-            # Read image and encode as base64
-            with open(output_image, "rb") as img_file:
-                img_data = img_file.read()
-                img_size_kb = len(img_data) / 1024
-                logger.debug(f"PNG image size: {img_size_kb:.2f} KB")
-
-                img_base64 = base64.b64encode(img_data).decode("utf-8", errors="ignore")
-                base64_size_kb = len(img_base64) / 1024
-                logger.debug(f"Base64 encoded size: {base64_size_kb:.2f} KB")
-
-            logger.info(
-                f"Chart image generation completed successfully: {img_size_kb:.2f}KB PNG"
-            )
-
-            return img_base64
-
-        except subprocess.TimeoutExpired:
-            logger.error("Chart generation timed out after 60 seconds")
-            raise Exception("Chart generation timed out")
-        except Exception as e:
-            logger.exception(f"Error executing chart generation code: {e}")
-            raise Exception(f"Error executing chart code: {str(e)}")
+    except Exception as e:
+        logger.exception(f"Error executing chart generation code: {e}")
+        raise Exception(f"Error executing chart code: {str(e)}")
@@ -0,0 +1,69 @@
+"""Concurrency control for calls to downstream services."""
+
+import asyncio
+from types import TracebackType
+from typing import Callable
+
+
+class AdaptiveConcurrencyLimiter:
+    """Async limiter whose concurrency limit adapts to downstream overload.
+
+    The limit grows additively while calls succeed (by one per limit-sized
+    window of successes) and is cut multiplicatively whenever a call fails
+    with an overload error, similar to TCP congestion control.
+
+    Waiting for a free slot raises TimeoutError after acquire_timeout seconds,
+    so calls queued behind a backed-off limit cannot hang indefinitely.
+
+    Usage:
+        async with limiter:
+            await call()
+    """
+
+    def __init__(
+        self,
+        is_overload: Callable[[BaseException], bool],
+        initial_limit: int = 8,
+        min_limit: int = 1,
+        max_limit: int = 64,
+        backoff_ratio: float = 0.5,
+        acquire_timeout: float | None = None,
+    ) -> None:
+        self._is_overload = is_overload
+        self._limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff_ratio = backoff_ratio
+        self.acquire_timeout = acquire_timeout
+        self._in_flight = 0
+        self._condition = asyncio.Condition()
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def __aenter__(self) -> None:
+        async with asyncio.timeout(self.acquire_timeout):
+            async with self._condition:
+                await self._condition.wait_for(lambda: self._in_flight < self.limit)
+                self._in_flight += 1
+
+    async def __aexit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if exc is None:
+            self._limit = min(self.max_limit, self._limit + 1 / self._limit)
+        elif self._is_overload(exc):
+            self._limit = max(self.min_limit, self._limit * self.backoff_ratio)
+
+        # Released before awaiting the lock so a cancellation cannot leak a slot
+        self._in_flight -= 1
+        async with self._condition:
+            self._condition.notify_all()
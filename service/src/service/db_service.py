@@ -3,7 +3,7 @@ import os
 import sqlite3
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
 from service.logging_config import logger
 
@@ -49,6 +49,10 @@ class SQLiteDatabase:
             logger.info(f"Connecting to database: {self.database_path}")
             self.connection = sqlite3.connect(self.database_path)
             self.connection.execute("PRAGMA foreign_keys = ON")
+            # Read-heavy workload: memory-map the file and keep a 64 MiB page cache
+            self.connection.execute("PRAGMA mmap_size = 268435456")
+            self.connection.execute("PRAGMA cache_size = -65536")
+            self.connection.execute("PRAGMA synchronous = NORMAL")
             self.is_connected = True
             logger.info("Database connection established successfully")
         except sqlite3.Error as e:
@@ -245,19 +249,35 @@ class SQLiteDatabase:
 
         return headers, self.process_sql_results(rows)
 
+    def query_iter(self, sql: str) -> tuple[list[str], Iterator[tuple]]:
+        """Execute a SELECT query and return headers plus a lazy row iterator."""
+        self.ensure_connected()
+
+        logger.debug("Executing SQL query (streamed): {}", sql)
+        cursor = self.connection.cursor()
+        cursor.execute(sql)
+
+        headers = (
+            [description[0] for description in cursor.description]
+            if cursor.description
+            else []
+        )
+
+        return headers, (self.process_sql_row(row) for row in cursor)
+
+    @staticmethod
+    def process_sql_row(row: tuple) -> tuple:
+        """Base64-encode BLOB values; rows without BLOBs are returned as-is."""
+        if not any(isinstance(item, bytes) for item in row):
+            return row
+        return tuple(
+            base64.b64encode(item).decode("utf-8") if isinstance(item, bytes) else item
+            for item in row
+        )
+
     @staticmethod
     def process_sql_results(sql_query_result_rows: list[tuple]) -> list[tuple]:
-        processed_rows: list[tuple] = []
-        for row in sql_query_result_rows:
-            processed_row = []
-            for item in row:
-                if isinstance(item, bytes):
-                    processed_row.append(base64.b64encode(item).decode("utf-8"))
-                else:
-                    processed_row.append(item)
-            processed_rows.append(tuple(processed_row))  # Convert back to tuple
-
-        return processed_rows
+        return [SQLiteDatabase.process_sql_row(row) for row in sql_query_result_rows]
 
 
 def main():
@@ -1,11 +1,16 @@
-from typing import NamedTuple, Protocol
+import json
+from typing import Any, NamedTuple, Protocol, cast
 
 import httpx
-from httpx import Timeout
+import orjson
+from httpx import Limits, Timeout
 
+from service.concurrency import AdaptiveConcurrencyLimiter
 from service.logging_config import logger
 
 Json = dict | list | bool | float | int | str | None
+# Skills take arbitrary JSON as input but always answer with a JSON object
+JsonObject = dict[str, Any]
 
 
 class Skill(NamedTuple):
@@ -22,43 +27,99 @@ class KernelException(Exception):
         super().__init__(msg)
 
 
+_MAX_CONCURRENT_CALLS = 256
+_POOL_TIMEOUT_SECONDS = 10
+
+# Responses signalling that the Kernel is overloaded rather than the request invalid
+_OVERLOAD_STATUS_CODES = frozenset({429, 502, 503, 504})
+
+
+def _is_overload(exc: BaseException) -> bool:
+    if isinstance(exc, KernelException):
+        return exc.status_code in _OVERLOAD_STATUS_CODES
+    return isinstance(exc, httpx.TimeoutException)
+
+
 class Kernel(Protocol):
-    async def run(self, skill: Skill, token: str, input: Json) -> Json: ...
+    async def run(self, skill: Skill, token: str, input: Json) -> JsonObject: ...
+
+
+def _encode(input: Json) -> bytes:
+    try:
+        return orjson.dumps(input)
+    except TypeError:
+        # orjson rejects integers wider than 64 bits, which query results can hold
+        return json.dumps(input).encode()
 
 
 class HttpKernel(Kernel):
     """Execute skills in the Kernel.
 
-    Cache connections to the Kernel across skill executions.
+    Cache connections to the Kernel across skill executions and adapt the number
+    of concurrent skill executions to the Kernel's load.
     """
 
     def __init__(self, url: str) -> None:
         self.url = url
-        timeout = Timeout(read=120, connect=10, write=10, pool=10)
-        self.session = httpx.AsyncClient(timeout=timeout)
+        timeout = Timeout(read=120, connect=10, write=10, pool=_POOL_TIMEOUT_SECONDS)
+        limits = Limits(
+            max_connections=_MAX_CONCURRENT_CALLS, max_keepalive_connections=64
+        )
+        self.session = httpx.AsyncClient(timeout=timeout, limits=limits, http2=True)
+        self._skill_urls: dict[Skill, str] = {}
+        # Start at the connection pool's limit and only cut concurrency once the
+        # Kernel reports overload; waiting for a slot is bounded like the pool
+        self._limiter = AdaptiveConcurrencyLimiter(
+            is_overload=_is_overload,
+            initial_limit=_MAX_CONCURRENT_CALLS,
+            max_limit=_MAX_CONCURRENT_CALLS,
+            acquire_timeout=_POOL_TIMEOUT_SECONDS,
+        )
         logger.info(f"HttpKernel initialized with URL: {url}")
 
-    async def run(self, skill: Skill, token: str, input: Json) -> Json:
-        url = f"{self.url}v1/skills/{skill.namespace}/{skill.name}/run"
+    async def run(self, skill: Skill, token: str, input: Json) -> JsonObject:
+        url = self._skill_url(skill)
 
-        logger.debug(f"Calling skill: {skill.as_str()}")
-        logger.debug(
-            f"Skill input keys: {list(input.keys()) if isinstance(input, dict) else type(input)}"
+        logger.opt(lazy=True).debug(
+            "Calling skill: {} (input size: {} keys)",
+            skill.as_str,
+            lambda: len(input) if isinstance(input, dict) else -1,
         )
 
-        response = await self.session.post(
-            url, json=input, headers={"Authorization": f"Bearer {token}"}
-        )
-
-        if response.status_code >= 400:
-            logger.error(
-                f"Skill execution failed: {skill.as_str()} - Status {response.status_code}"
-            )
-            logger.debug(f"Error response: {response.text[:500]}")
-            raise KernelException(response.status_code, response.text)
+        try:
+            async with self._limiter:
+                response = await self.session.post(
+                    url,
+                    content=_encode(input),
+                    headers={
+                        "Authorization": f"Bearer {token}",
+                        "Content-Type": "application/json",
+                    },
+                )
+
+                if response.status_code >= 400:
+                    logger.error(
+                        f"Skill execution failed: {skill.as_str()} - Status {response.status_code}"
+                    )
+                    logger.opt(lazy=True).debug(
+                        "Error response: {}", lambda: response.text[:500]
+                    )
+                    raise KernelException(response.status_code, response.text)
+        except TimeoutError as exc:
+            # Only the limiter raises TimeoutError; httpx has its own exceptions
+            logger.error(f"No free Kernel slot for skill: {skill.as_str()}")
+            raise KernelException(
+                503, "Timed out waiting for a free Kernel slot"
+            ) from exc
 
         logger.info(f"Skill executed successfully: {skill.as_str()}")
-        return response.json()
+        return cast(JsonObject, orjson.loads(response.content))
+
+    def _skill_url(self, skill: Skill) -> str:
+        if (url := self._skill_urls.get(skill)) is None:
+            url = f"{self.url}v1/skills/{skill.namespace}/{skill.name}/run"
+            self._skill_urls[skill] = url
+        return url
 
     async def shutdown(self):
         logger.info("Shutting down HttpKernel session")
@@ -2,9 +2,11 @@ from contextlib import asynccontextmanager
 
 import uvicorn
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from starlette.middleware.cors import CORSMiddleware
 from starlette.staticfiles import StaticFiles
 
+from service.chart_service import shutdown_render_pool, start_render_pool
 from service.db_service import SQLiteDatabase
 from service.dependencies import with_settings
 from service.kernel import HttpKernel
@@ -31,6 +33,9 @@ async def lifespan(app: FastAPI):
     initialize(client, database)
     logger.info("Tool executor initialized")
 
+    start_render_pool()
+    logger.info("Chart render workers started")
+
     yield {"kernel": client, "database": database}
 
     logger.info("Application shutdown: Cleaning up resources")
@@ -38,10 +43,12 @@ async def lifespan(app: FastAPI):
     logger.debug("HTTP Kernel client shut down")
     database.disconnect()
     logger.debug("Database connection closed")
+    shutdown_render_pool()
+    logger.debug("Chart render workers stopped")
     logger.info("Application shutdown complete")
 
 
-app = FastAPI(lifespan=lifespan)
+app = FastAPI(lifespan=lifespan, default_response_class=ORJSONResponse)
 
 ###############################################################################
 # WARNING: Do not modify this CORS configuration unless you fully understand    #
@@ -6,7 +6,7 @@ Tools defined with @mcp.tool() decorators can be:
 2. Called programmatically via execute_tool() for HTTP API
 """
 
-from typing import Any, Callable
+from typing import Any, AsyncIterator, Callable
 
 from fastmcp import FastMCP
 
@@ -14,6 +14,7 @@ from service.logging_config import logger
 from service.tools import (
     tool_classify_chart_type,
     tool_execute_sql,
+    tool_execute_sql_stream,
     tool_generate_chart,
     tool_generate_sql,
 )
@@ -147,6 +148,17 @@ _TOOL_IMPLEMENTATIONS: dict[str, Callable] = {
 }
 
 
+def stream_sql(query: str) -> AsyncIterator[bytes]:
+    """
+    Execute SQL query and stream the result as NDJSON.
+
+    Only available over HTTP; SQL errors are raised before streaming starts,
+    errors while reading rows end the stream with an error line.
+    """
+    logger.info("Executing: execute_sql (streamed)")
+    return tool_execute_sql_stream(_database, query)
+
+
 async def execute_tool(tool_name: str, arguments: dict[str, Any]) -> Any:
     """
     Execute FastMCP tool programmatically.
@@ -171,4 +183,4 @@ async def execute_tool(tool_name: str, arguments: dict[str, Any]) -> Any:
     return await tool_impl(**arguments)
 
 
-__all__ = ["mcp", "initialize", "set_token", "execute_tool"]
+__all__ = ["mcp", "initialize", "set_token", "execute_tool", "stream_sql"]
@@ -2,6 +2,7 @@ import json
 import logging
 import os
 import random
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from uuid import uuid4
 
@@ -31,6 +32,9 @@ DOCUMENT_INDEX_CLIENT_URL = os.getenv("DOCUMENT_INDEX_CLIENT_URL")
 DOCUMENT_INDEX_NAMESPACE = os.getenv("DOCUMENT_INDEX_NAMESPACE")
 DOCUMENT_INDEX_COLLECTION = os.getenv("DOCUMENT_INDEX_COLLECTION")
 
+# Number of documents uploaded to the Document Index in parallel
+INDEXING_CONCURRENCY = 32
+
 document_index_client = DocumentIndexClient(
     token=PHARIA_AI_TOKEN, base_url=DOCUMENT_INDEX_CLIENT_URL
 )
@@ -129,6 +133,31 @@ def get_examples_from_json() -> list[SpiderExample]:
     return [SpiderExample.model_validate(ex) for ex in sampled_examples]
 
 
+def index_example(example: SpiderExample) -> None:
+    """
+    Add a single example to the collection as a new document.
+    """
+    document_name = str(uuid4())
+    document_path = DocumentPath(
+        collection_path=CollectionPath(
+            namespace=DOCUMENT_INDEX_NAMESPACE, collection=DOCUMENT_INDEX_COLLECTION
+        ),
+        document_name=document_name,
+    )
+    document_index_client.add_document(
+        document_path,
+        contents=DocumentContents._from_modalities_json(
+            {
+                "contents": [{"modality": "text", "text": example.question}],
+                "metadata": {
+                    "query": example.query,
+                    "db_id": example.db_id,
+                },
+            }
+        ),
+    )
+
+
 if __name__ == "__main__":
     validate_environment()
     # We only need to run this once to setup the collection and index.
@@ -142,23 +171,11 @@ if __name__ == "__main__":
 
     examples = get_examples_from_json()
 
-    for example in tqdm(examples, desc="Indexing documents"):
-        document_name = str(uuid4())
-        document_path = DocumentPath(
-            collection_path=CollectionPath(
-                namespace=DOCUMENT_INDEX_NAMESPACE, collection=DOCUMENT_INDEX_COLLECTION
-            ),
-            document_name=document_name,
-        )
-        document_index_client.add_document(
-            document_path,
-            contents=DocumentContents._from_modalities_json(
-                {
-                    "contents": [{"modality": "text", "text": example.question}],
-                    "metadata": {
-                        "query": example.query,
-                        "db_id": example.db_id,
-                    },
-                }
-            ),
+    with ThreadPoolExecutor(max_workers=INDEXING_CONCURRENCY) as executor:
+        list(
+            tqdm(
+                executor.map(index_example, examples),
+                total=len(examples),
+                desc="Indexing documents",
+            )
         )
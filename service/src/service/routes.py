@@ -1,11 +1,17 @@
+import asyncio
+import hashlib
+import re
+import sqlite3
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
+from service.cache import SingleFlight, TTLCache, key_bytes
 from service.dependencies import get_token, with_kernel
-from service.kernel import Json, Kernel, KernelException, Skill
+from service.kernel import Kernel, KernelException, Skill
 from service.logging_config import logger
-from service.mcp_server import execute_tool, set_token
+from service.mcp_server import execute_tool, set_token, stream_sql
 from service.models import (
     AgentRequest,
     AgentResponse,
@@ -16,6 +22,33 @@ from service.models import (
 
 router: APIRouter = APIRouter()
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+_TOOL_ROUTER_SKILL = Skill(namespace="playground", name="tool_router")
+
+_RESPONSE_TYPES = {
+    "generate_sql": ToolResponseType.SQL_QUERY,
+    "execute_sql": ToolResponseType.QUERY_RESULTS,
+    "classify_chart_type": ToolResponseType.CHART_TYPE,
+    "generate_chart": ToolResponseType.CHART_IMAGE,
+}
+
+# Bound concurrent SQL self-corrections; one attempt per delay (in seconds)
+_CORRECTION_SEMAPHORE = asyncio.Semaphore(8)
+_CORRECTION_BACKOFF_SECONDS = (0.0, 0.2, 0.8)
+
+_FIXABLE_SQL_ERROR_RE = re.compile(
+    r"no such function|syntax error|no such column|near", re.IGNORECASE
+)
+
+# Identical tool_router calls in flight at the same time share one skill run;
+# both are keyed by _router_cache_key and only used for cacheable inputs
+_router_calls: SingleFlight[bytes, Any] = SingleFlight()
+
+# Router decisions for repeated (message, context) pairs; contexts carrying
+# query results are not cached since they vary with every query
+_router_decisions: TTLCache[bytes, ToolRouterDecision] = TTLCache(maxsize=1024, ttl=300)
+
 
 @router.get("/health")
 def health() -> HealthResponse:
@@ -28,7 +61,7 @@ async def agent_endpoint(
     request: Request,
     token: str = Depends(get_token),
     kernel: Kernel = Depends(with_kernel),
-) -> Json:
+) -> Response:
     """
     Intelligent agent endpoint.
 
@@ -37,8 +70,7 @@ async def agent_endpoint(
     logger.info("Agent: Request received")
 
     try:
-        body = await request.json()
-        req = AgentRequest(**body)
+        req = AgentRequest.model_validate_json(await request.body())
         logger.info(f"Agent: Message: {req.message}")
 
         set_token(token)
@@ -48,19 +80,26 @@ async def agent_endpoint(
         )
 
         if not decision:
-            return _error_response("Could not determine tool")
+            error = _error_response("Could not determine tool")
+            return ORJSONResponse(error.model_dump())
 
         logger.info(f"Agent: Executing tool: {decision.tool}")
 
+        accepts_ndjson = NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+        if decision.tool == "execute_sql" and accepts_ndjson:
+            streamed = _stream_query_results(decision)
+            if streamed:
+                return streamed
+
         response = await _execute_with_retry(decision, req.message, req.context or {})
 
-        return response.model_dump()
+        return ORJSONResponse(response.model_dump())
 
     except HTTPException:
         raise
     except Exception as e:
         logger.exception(f"Agent failed: {e}")
-        return _error_response(str(e)).model_dump()
+        return ORJSONResponse(_error_response(str(e)).model_dump())
 
 
 async def _get_tool_decision(
@@ -72,21 +111,36 @@ async def _get_tool_decision(
     Returns:
         ToolRouterDecision with tool name and arguments, or None if failed
     """
-    logger.debug("Calling tool_router skill")
-
     try:
-        router_skill = Skill(namespace="playground", name="tool_router")
-        response = await kernel.run(
-            router_skill,
-            token,
-            {"message": message, "context": context if context else None},
+        router_input = {"message": message, "context": context or None}
+        cache_key = (
+            _router_cache_key(token, router_input)
+            if _is_cacheable(router_input)
+            else None
         )
-
-        decision = ToolRouterDecision(
-            tool=response.get("tool", ""), arguments=response.get("arguments", {})
+        if cache_key and (decision := _router_decisions.get(cache_key)) is not None:
+            logger.info(f"Tool-router decision served from cache: {decision.tool}")
+            return decision
+
+        logger.debug("Calling tool_router skill")
+        if cache_key:
+            response = await _router_calls.run(
+                cache_key, lambda: kernel.run(_TOOL_ROUTER_SKILL, token, router_input)
+            )
+        else:
+            response = await kernel.run(_TOOL_ROUTER_SKILL, token, router_input)
+
+        decision = ToolRouterDecision.model_validate(
+            {
+                "tool": response.get("tool", ""),
+                "arguments": response.get("arguments", {}),
+            }
         )
 
         logger.info(f"Tool-router chose: {decision.tool}")
+        # Only decisions naming a known tool are served again
+        if cache_key and decision.tool in _RESPONSE_TYPES:
+            _router_decisions.set(cache_key, decision)
         return decision
 
     except KernelException as e:
@@ -97,6 +151,17 @@ async def _get_tool_decision(
         return None
 
 
+def _router_cache_key(token: str, router_input: dict[str, Any]) -> bytes:
+    """Return the key identifying a tool_router call for a token and input."""
+    return hashlib.blake2b(key_bytes([token, router_input]), digest_size=16).digest()
+
+
+def _is_cacheable(router_input: dict[str, Any]) -> bool:
+    """Check whether the decision for a tool_router input may be cached."""
+    context = router_input["context"] or {}
+    return "headers" not in context and "rows" not in context
+
+
 def _fallback_tool_decision(
     message: str, context: dict[str, Any]
 ) -> ToolRouterDecision:
@@ -129,18 +194,11 @@ async def _execute_with_retry(
     Returns:
         AgentResponse with typed data
     """
-    response_types = {
-        "generate_sql": ToolResponseType.SQL_QUERY,
-        "execute_sql": ToolResponseType.QUERY_RESULTS,
-        "classify_chart_type": ToolResponseType.CHART_TYPE,
-        "generate_chart": ToolResponseType.CHART_IMAGE,
-    }
-
     try:
         data = await execute_tool(decision.tool, decision.arguments)
 
         return AgentResponse(
-            response_type=response_types.get(decision.tool, ToolResponseType.ERROR),
+            response_type=_RESPONSE_TYPES.get(decision.tool, ToolResponseType.ERROR),
             data=data,
             tool_used=decision.tool,
             success=True,
@@ -150,56 +208,78 @@ async def _execute_with_retry(
         error_msg = str(e)
 
         if decision.tool == "execute_sql" and _is_fixable_sql_error(error_msg):
-            retry_response = await _retry_sql_with_correction(
-                error_msg, message, context
-            )
-            if retry_response:
-                return retry_response
+            for delay in _CORRECTION_BACKOFF_SECONDS:
+                await asyncio.sleep(delay)
+                async with _CORRECTION_SEMAPHORE:
+                    try:
+                        return await _retry_sql_with_correction(
+                            error_msg, message, context
+                        )
+                    except Exception as retry_error:
+                        logger.error(f"Retry failed: {retry_error}")
+                        # Feed the corrected SQL's own error into the next attempt
+                        error_msg = str(retry_error)
+                if not _is_fixable_sql_error(error_msg):
+                    break
 
         return _error_response(error_msg, decision.tool)
 
 
+def _stream_query_results(decision: ToolRouterDecision) -> StreamingResponse | None:
+    """
+    Stream execute_sql results as NDJSON.
+
+    Returns:
+        StreamingResponse, or None if the query failed and the regular
+        execution path (with SQL self-correction) should handle it
+    """
+    try:
+        lines = stream_sql(decision.arguments["query"])
+    except sqlite3.Error as e:
+        logger.warning(f"Streamed execute_sql failed, using regular path: {e}")
+        return None
+
+    return StreamingResponse(lines, media_type=NDJSON_MEDIA_TYPE)
+
+
 def _is_fixable_sql_error(error: str) -> bool:
     """Check if SQL error is fixable through regeneration."""
-    fixable_errors = ["no such function", "syntax error", "no such column", "near"]
-    return any(err in error.lower() for err in fixable_errors)
+    return _FIXABLE_SQL_ERROR_RE.search(error) is not None
 
 
 async def _retry_sql_with_correction(
     error: str, message: str, context: dict[str, Any]
-) -> AgentResponse | None:
+) -> AgentResponse:
     """
     Attempt to fix SQL error by regenerating with feedback.
 
     Returns:
-        AgentResponse if successful, None if failed
+        AgentResponse with the corrected query's results
+
+    Raises:
+        Exception: if regenerating or executing the corrected SQL failed
     """
     logger.warning(f"SQL failed: {error}")
     logger.info("Attempting SQL self-correction")
 
-    try:
-        original_question = context.get("original_question", message)
-
-        corrected = await execute_tool(
-            "generate_sql", {"question": original_question, "error_feedback": error}
-        )
+    original_question = context.get("original_question", message)
 
-        logger.info("Retrying with corrected SQL")
+    corrected = await execute_tool(
+        "generate_sql", {"question": original_question, "error_feedback": error}
+    )
 
-        data = await execute_tool("execute_sql", {"query": corrected["sql_query"]})
+    logger.info("Retrying with corrected SQL")
 
-        logger.info("SQL self-correction successful!")
+    data = await execute_tool("execute_sql", {"query": corrected["sql_query"]})
 
-        return AgentResponse(
-            response_type=ToolResponseType.QUERY_RESULTS,
-            data=data,
-            tool_used="execute_sql",
-            success=True,
-        )
+    logger.info("SQL self-correction successful!")
 
-    except Exception as retry_error:
-        logger.error(f"Retry failed: {retry_error}")
-        return None
+    return AgentResponse(
+        response_type=ToolResponseType.QUERY_RESULTS,
+        data=data,
+        tool_used="execute_sql",
+        success=True,
+    )
 
 
 def _error_response(error: str, tool_used: str = "unknown") -> AgentResponse:
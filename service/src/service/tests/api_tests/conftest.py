@@ -5,7 +5,7 @@ from fastapi.testclient import TestClient
 from pytest import fixture
 
 from service.dependencies import with_kernel
-from service.kernel import Json, Kernel, KernelException, Skill
+from service.kernel import Json, JsonObject, Kernel, KernelException, Skill
 from service.main import app
 
 
@@ -40,13 +40,13 @@ class SpyKernel(Kernel):
     def __init__(self) -> None:
         self.requests: list[Request] = []
 
-    async def run(self, skill: Skill, token: str, input: Json) -> Json:
+    async def run(self, skill: Skill, token: str, input: Json) -> JsonObject:
         self.requests.append(Request(skill, token, input))
         return {"answer": "A real answer."}
 
 
 class SaboteurKernel(Kernel):
-    async def run(self, skill: Skill, token: str, input: Json) -> Json:
+    async def run(self, skill: Skill, token: str, input: Json) -> JsonObject:
         raise KernelException(404, "should never run")
 
 
@@ -0,0 +1,62 @@
+import asyncio
+
+from service.cache import LRUCache, SingleFlight, TTLCache
+
+
+def test_lru_cache_returns_cached_value() -> None:
+    cache: LRUCache[str, int] = LRUCache(maxsize=2)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+
+
+def test_lru_cache_evicts_least_recently_used_entry() -> None:
+    cache: LRUCache[str, int] = LRUCache(maxsize=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    # Reading "a" makes "b" the least recently used entry
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert len(cache) == 2
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_ttl_cache_expires_entries() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=0)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+
+
+def test_ttl_cache_returns_fresh_entries() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+
+    assert cache.get("a") == 1
+
+
+async def test_single_flight_coalesces_concurrent_calls() -> None:
+    single_flight: SingleFlight[str, int] = SingleFlight()
+    calls = 0
+
+    async def compute() -> int:
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0)
+        return 42
+
+    results = await asyncio.gather(
+        single_flight.run("key", compute), single_flight.run("key", compute)
+    )
+
+    assert results == [42, 42]
+    assert calls == 1
+
+    # Once the call completed, the next one executes again
+    assert await single_flight.run("key", compute) == 42
+    assert calls == 2
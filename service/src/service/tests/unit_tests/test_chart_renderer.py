@@ -0,0 +1,40 @@
+import matplotlib.pyplot as plt
+import pandas as pd
+
+from service.chart_renderer import _MIN_COERCION_CELLS, _prepare_dataframe, _render
+
+
+def test_small_results_are_not_coerced() -> None:
+    rows = [["a", "1"]] * (_MIN_COERCION_CELLS // 2 - 1)
+
+    df = _prepare_dataframe(["Name", "Value"], rows)
+
+    assert df.size < _MIN_COERCION_CELLS
+    assert df["Value"].tolist() == ["1"] * len(rows)
+
+
+def test_mostly_numeric_text_columns_are_coerced_from_the_threshold() -> None:
+    rows = [["a", "1"]] * (_MIN_COERCION_CELLS // 2 - 1) + [["b", "n/a"]]
+
+    df = _prepare_dataframe(["Name", "Value"], rows)
+
+    assert df.size == _MIN_COERCION_CELLS
+    assert df["Value"].tolist() == [1] * (len(rows) - 1) + [0]
+    assert df["Name"].tolist() == [row[0] for row in rows]
+
+
+def test_settings_changed_by_chart_code_do_not_leak_into_later_renders() -> None:
+    facecolor = plt.rcParams["axes.facecolor"]
+    max_rows = pd.get_option("display.max_rows")
+
+    _render(
+        "plt.rcParams['axes.facecolor'] = 'red'\n"
+        "pd.set_option('display.max_rows', 3)\n"
+        "plt.bar(df.Name, df.Value)",
+        ["Name", "Value"],
+        [["a", 1]],
+    )
+
+    assert plt.rcParams["axes.facecolor"] == facecolor
+    assert pd.get_option("display.max_rows") == max_rows
+    assert plt.get_fignums() == []
@@ -0,0 +1,111 @@
+import pytest
+
+from service import chart_service
+from service.chart_service import (
+    _chart_cache_key,
+    _generate_chart_code,
+    _heuristic_chart_type,
+    generate_chart_image,
+)
+from service.kernel import Json, JsonObject, Kernel, Skill
+
+
+class ChartKernel(Kernel):
+    def __init__(self, chart_type: str) -> None:
+        self.chart_type = chart_type
+        self.generated: list[str] = []
+
+    async def run(self, skill: Skill, token: str, input: Json) -> JsonObject:
+        assert isinstance(input, dict)
+        if skill.name == "chart_classifier":
+            return {"chart_type": self.chart_type}
+        self.generated.append(input["chart_type"])
+        return {"chart_code": f"plot_{input['chart_type']}()"}
+
+
+def test_time_series_results_are_charted_as_line() -> None:
+    headers = ["OrderMonth", "TotalSales"]
+    rows = [["2024-01", 100], ["2024-02", 120], ["2024-03", 90]]
+
+    assert _heuristic_chart_type(headers, rows) == "line"
+
+
+def test_categorical_results_are_left_to_the_classifier() -> None:
+    headers = ["Category", "Count"]
+    rows = [["Beverages", 12], ["Condiments", 12], ["Seafood", 12]]
+
+    assert _heuristic_chart_type(headers, rows) is None
+
+
+def test_short_time_series_is_left_to_the_classifier() -> None:
+    headers = ["Year", "TotalSales"]
+    rows = [[2023, 100], [2024, 120]]
+
+    assert _heuristic_chart_type(headers, rows) is None
+
+
+def test_chart_cache_key_handles_wide_integers() -> None:
+    assert _chart_cache_key("q", ["n"], [[2**70]]) != _chart_cache_key(
+        "q", ["n"], [[2**70 + 1]]
+    )
+
+
+async def test_speculative_bar_code_is_discarded_for_other_chart_types() -> None:
+    kernel = ChartKernel("pie")
+    headers = ["Category", "Share"]
+    rows = [["Beverages", 0.6], ["Seafood", 0.4]]
+
+    chart_code = await _generate_chart_code(kernel, "token", "pie?", headers, rows)
+
+    assert chart_code == "plot_pie()"
+    assert "pie" in kernel.generated
+
+
+async def test_speculative_bar_code_is_used_for_bar_charts() -> None:
+    kernel = ChartKernel("bar")
+    headers = ["Category", "Count"]
+    rows = [["Beverages", 12], ["Seafood", 10]]
+
+    chart_code = await _generate_chart_code(kernel, "token", "bar?", headers, rows)
+
+    assert chart_code == "plot_bar()"
+    assert kernel.generated == ["bar"]
+
+
+async def test_cached_charts_are_not_rendered_again(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    rendered: list[str] = []
+
+    async def render_chart(chart_code: str, headers: list, rows: list) -> bytes:
+        rendered.append(chart_code)
+        return b"png"
+
+    monkeypatch.setattr(chart_service, "_render_chart", render_chart)
+    kernel = ChartKernel("bar")
+    headers = ["Category", "Count"]
+    rows = [["Beverages", 12], ["Seafood", 10]]
+
+    first = await generate_chart_image(kernel, "token", "cached?", headers, rows)
+    second = await generate_chart_image(kernel, "token", "cached?", headers, rows)
+
+    assert first == second == "cG5n"
+    assert rendered == ["plot_bar()"]
+
+
+async def test_a_crashed_render_worker_does_not_break_later_renders() -> None:
+    headers = ["Category", "Count"]
+    rows = [["Beverages", 12], ["Seafood", 10]]
+    try:
+        with pytest.raises(Exception, match="died"):
+            await chart_service._render_chart(
+                "import matplotlib\nmatplotlib.os._exit(1)", headers, rows
+            )
+
+        png = await chart_service._render_chart(
+            "plt.bar(df.Category, df.Count)", headers, rows
+        )
+    finally:
+        chart_service.shutdown_render_pool()
+
+    assert png.startswith(b"\x89PNG")
@@ -0,0 +1,74 @@
+import asyncio
+from typing import Any
+
+import pytest
+
+from service.concurrency import AdaptiveConcurrencyLimiter
+
+
+class OverloadError(Exception):
+    pass
+
+
+def _limiter(**kwargs: Any) -> AdaptiveConcurrencyLimiter:
+    return AdaptiveConcurrencyLimiter(
+        is_overload=lambda exc: isinstance(exc, OverloadError), **kwargs
+    )
+
+
+async def test_limiter_bounds_concurrent_calls() -> None:
+    limiter = _limiter(initial_limit=2)
+    peak = 0
+
+    async def call() -> None:
+        nonlocal peak
+        async with limiter:
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0)
+
+    await asyncio.gather(*(call() for _ in range(6)))
+
+    assert peak == 2
+    assert limiter.in_flight == 0
+
+
+async def test_limiter_backs_off_on_overload() -> None:
+    limiter = _limiter(initial_limit=8, min_limit=1)
+
+    with pytest.raises(OverloadError):
+        async with limiter:
+            raise OverloadError()
+
+    assert limiter.limit == 4
+    assert limiter.in_flight == 0
+
+
+async def test_limiter_ignores_other_errors() -> None:
+    limiter = _limiter(initial_limit=8)
+
+    with pytest.raises(ValueError):
+        async with limiter:
+            raise ValueError()
+
+    assert limiter.limit == 8
+
+
+async def test_limiter_grows_on_success_up_to_max() -> None:
+    limiter = _limiter(initial_limit=2, max_limit=3)
+
+    for _ in range(20):
+        async with limiter:
+            pass
+
+    assert limiter.limit == 3
+
+
+async def test_limiter_bounds_the_wait_for_a_slot() -> None:
+    limiter = _limiter(initial_limit=1, acquire_timeout=0.01)
+
+    async with limiter:
+        with pytest.raises(TimeoutError):
+            async with limiter:
+                pass
+
+    assert limiter.in_flight == 0
@@ -0,0 +1,30 @@
+import sqlite3
+from pathlib import Path
+
+from service.db_service import SQLiteDatabase
+
+
+def _database(tmp_path: Path) -> SQLiteDatabase:
+    path = str(tmp_path / "test.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE items (name TEXT, data BLOB)")
+        connection.executemany(
+            "INSERT INTO items VALUES (?, ?)", [("a", b"\x00\x01"), ("b", None)]
+        )
+    return SQLiteDatabase(path)
+
+
+def test_query_iter_returns_headers_and_lazy_rows(tmp_path: Path) -> None:
+    database = _database(tmp_path)
+
+    headers, rows = database.query_iter("SELECT name, data FROM items ORDER BY name")
+
+    assert headers == ["name", "data"]
+    assert next(rows) == ("a", "AAE=")
+    assert list(rows) == [("b", None)]
+
+
+def test_process_sql_row_leaves_rows_without_blobs_untouched() -> None:
+    row = ("a", 1, None)
+
+    assert SQLiteDatabase.process_sql_row(row) is row
@@ -0,0 +1,113 @@
+import sqlite3
+from collections.abc import AsyncIterator
+from typing import Any
+
+import pytest
+
+from service import routes
+from service.kernel import Json, JsonObject, Kernel, Skill
+from service.models import ToolRouterDecision
+
+
+async def test_sql_correction_feeds_back_the_latest_error(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    feedback: list[str] = []
+    errors = iter(["no such column: b", "no such column: c"])
+
+    async def execute_tool(tool: str, arguments: dict[str, Any]) -> dict[str, Any]:
+        if tool == "generate_sql":
+            feedback.append(arguments["error_feedback"])
+            return {"success": True, "sql_query": "SELECT 1"}
+        if (error := next(errors, None)) is not None:
+            raise Exception(error)
+        return {"headers": ["1"], "rows": [[1]]}
+
+    monkeypatch.setattr(routes, "execute_tool", execute_tool)
+    monkeypatch.setattr(routes, "_CORRECTION_BACKOFF_SECONDS", (0.0, 0.0, 0.0))
+
+    decision = ToolRouterDecision(tool="execute_sql", arguments={"query": "SELECT a"})
+    response = await routes._execute_with_retry(decision, "question", {})
+
+    assert response.success
+    assert feedback == ["no such column: b", "no such column: c"]
+
+
+async def test_sql_correction_stops_at_an_unfixable_error(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    attempts = 0
+
+    async def execute_tool(tool: str, arguments: dict[str, Any]) -> dict[str, Any]:
+        nonlocal attempts
+        if tool == "generate_sql":
+            attempts += 1
+            return {"success": True, "sql_query": "SELECT 1"}
+        raise Exception("database is locked" if attempts else "no such column: b")
+
+    monkeypatch.setattr(routes, "execute_tool", execute_tool)
+    monkeypatch.setattr(routes, "_CORRECTION_BACKOFF_SECONDS", (0.0, 0.0, 0.0))
+
+    decision = ToolRouterDecision(tool="execute_sql", arguments={"query": "SELECT b"})
+    response = await routes._execute_with_retry(decision, "question", {})
+
+    assert not response.success
+    assert response.data == {"error": "database is locked"}
+    assert attempts == 1
+
+
+class RouterKernel(Kernel):
+    def __init__(self, response: JsonObject) -> None:
+        self.response = response
+        self.calls = 0
+
+    async def run(self, skill: Skill, token: str, input: Json) -> JsonObject:
+        self.calls += 1
+        return self.response
+
+
+async def test_router_decisions_are_cached_per_token() -> None:
+    kernel = RouterKernel({"tool": "generate_sql", "arguments": {"question": "q"}})
+
+    for token in ("token-a", "token-a", "token-b"):
+        await routes._get_tool_decision(kernel, token, "cached per token", {})
+
+    assert kernel.calls == 2
+
+
+async def test_malformed_router_decisions_are_not_cached() -> None:
+    kernel = RouterKernel({"arguments": {}})
+
+    for _ in range(2):
+        decision = await routes._get_tool_decision(kernel, "token", "malformed", {})
+        assert decision is not None and decision.tool == ""
+
+    assert kernel.calls == 2
+
+
+def test_bad_sql_falls_back_to_the_regular_path(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    def stream_sql(query: str) -> AsyncIterator[bytes]:
+        raise sqlite3.OperationalError("no such table: missing")
+
+    monkeypatch.setattr(routes, "stream_sql", stream_sql)
+
+    decision = ToolRouterDecision(
+        tool="execute_sql", arguments={"query": "SELECT * FROM missing"}
+    )
+
+    assert routes._stream_query_results(decision) is None
+
+
+async def test_contexts_with_wide_integers_are_still_routed() -> None:
+    kernel = RouterKernel({"tool": "generate_sql", "arguments": {"question": "q"}})
+
+    for context in (
+        {"query": "q", "limit": 2**70},
+        {"headers": ["n"], "rows": [[2**70]]},
+    ):
+        decision = await routes._get_tool_decision(kernel, "token", "wide", context)
+        assert decision is not None and decision.tool == "generate_sql"
+
+    assert kernel.calls == 2
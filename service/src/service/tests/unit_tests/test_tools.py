@@ -0,0 +1,64 @@
+import sqlite3
+from collections.abc import AsyncIterator, Iterator
+from pathlib import Path
+
+import orjson
+import pytest
+
+from service import tools
+from service.db_service import SQLiteDatabase
+from service.tools import _ndjson_lines, tool_execute_sql_stream
+
+
+async def _read_lines(chunks: AsyncIterator[bytes]) -> list[bytes]:
+    return b"".join([chunk async for chunk in chunks]).splitlines()
+
+
+async def test_sql_stream_starts_with_headers_and_encodes_blobs(
+    tmp_path: Path,
+) -> None:
+    path = str(tmp_path / "test.db")
+    with sqlite3.connect(path) as connection:
+        connection.execute("CREATE TABLE items (name TEXT, data BLOB)")
+        connection.execute("INSERT INTO items VALUES ('a', x'0001')")
+    database = SQLiteDatabase(path)
+
+    lines = await _read_lines(
+        tool_execute_sql_stream(database, "SELECT name, data FROM items")
+    )
+
+    assert [orjson.loads(line) for line in lines] == [
+        {"headers": ["name", "data"]},
+        ["a", "AAE="],
+    ]
+
+
+def test_sql_stream_raises_bad_sql_before_streaming(tmp_path: Path) -> None:
+    database = SQLiteDatabase(str(tmp_path / "test.db"))
+
+    with pytest.raises(sqlite3.OperationalError):
+        tool_execute_sql_stream(database, "SELECT * FROM missing")
+
+
+async def test_ndjson_lines_are_sent_in_batches(
+    monkeypatch: pytest.MonkeyPatch,
+) -> None:
+    monkeypatch.setattr(tools, "_NDJSON_BATCH_ROWS", 2)
+
+    chunks = [chunk async for chunk in _ndjson_lines(["n"], iter([(1,), (2,), (3,)]))]
+
+    assert chunks == [b'{"headers":["n"]}\n', b"[1]\n[2]\n", b"[3]\n"]
+
+
+async def test_ndjson_lines_end_with_error_record_on_sql_error() -> None:
+    def rows() -> Iterator[tuple]:
+        yield (1,)
+        raise sqlite3.OperationalError("database is locked")
+
+    lines = await _read_lines(_ndjson_lines(["n"], rows()))
+
+    assert [orjson.loads(line) for line in lines] == [
+        {"headers": ["n"]},
+        [1],
+        {"error": "database is locked"},
+    ]
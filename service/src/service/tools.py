@@ -1,12 +1,21 @@
 """Tool functions that wrap Pharia skills for Text2SQL."""
 
-from typing import Any, Dict, List
+import sqlite3
+from typing import Any, AsyncIterator, Dict, Iterator, List
 
-from service.chart_service import generate_chart_image
+import orjson
+
+from service.chart_service import chart_classifier_input, generate_chart_image
 from service.db_service import SQLiteDatabase
 from service.kernel import Kernel, KernelException, Skill
 from service.logging_config import logger
 
+_SQL_GENERATOR_SKILL = Skill(namespace="playground", name="sql-generator")
+_CHART_CLASSIFIER_SKILL = Skill(namespace="playground", name="chart_classifier")
+
+# Rows encoded per chunk when streaming query results as NDJSON
+_NDJSON_BATCH_ROWS = 500
+
 
 async def tool_generate_sql(
     kernel: Kernel, token: str, question: str, error_feedback: str | None = None
@@ -23,14 +32,14 @@ async def tool_generate_sql(
         logger.info(f"Retrying with error feedback: {error_feedback[:100]}...")
 
     try:
-        skill = Skill(namespace="playground", name="sql-generator")
-
         # Include error feedback to help skill correct itself
         skill_question = question
         if error_feedback:
             skill_question = f"{question}\n\nPrevious attempt failed with error: {error_feedback}\nPlease fix the SQL for SQLite (use strftime for dates, etc.)"
 
-        response = await kernel.run(skill, token, {"question": skill_question})
+        response = await kernel.run(
+            _SQL_GENERATOR_SKILL, token, {"question": skill_question}
+        )
 
         sql_query = response.get("answer")
         if not sql_query:
@@ -78,17 +87,67 @@ async def tool_execute_sql(database: SQLiteDatabase, query: str) -> Dict[str, An
         return {"success": False, "error": str(e)}
 
 
+def tool_execute_sql_stream(
+    database: SQLiteDatabase, query: str
+) -> AsyncIterator[bytes]:
+    """
+    Execute SQL query on database and stream the result as NDJSON.
+
+    The first line holds the headers, every following line one row. The query is
+    executed before this returns, so SQL errors are raised here; an error while
+    reading rows ends the stream with an error line instead.
+    """
+    logger.info("Tool execute_sql_stream called")
+    logger.debug("Query: {}", query)
+
+    if not database.is_connected:
+        logger.debug("Connecting to database...")
+        database.connect()
+
+    headers, rows = database.query_iter(query)
+    return _ndjson_lines(headers, rows)
+
+
+async def _ndjson_lines(
+    headers: list[str], rows: Iterator[tuple]
+) -> AsyncIterator[bytes]:
+    yield orjson.dumps({"headers": headers}) + b"\n"
+
+    batch: list[bytes] = []
+    row_count = 0
+    try:
+        for row in rows:
+            batch.append(orjson.dumps(row))
+            row_count += 1
+            if len(batch) == _NDJSON_BATCH_ROWS:
+                yield b"\n".join(batch) + b"\n"
+                batch.clear()
+    except sqlite3.Error as e:
+        logger.error(f"Query failed after streaming {row_count} rows: {e}")
+        batch.append(orjson.dumps({"error": str(e)}))
+        yield b"\n".join(batch) + b"\n"
+        return
+
+    if batch:
+        yield b"\n".join(batch) + b"\n"
+
+    logger.info(f"Query results streamed: {row_count} rows, {len(headers)} columns")
+
+
 async def tool_classify_chart_type(
     kernel: Kernel, token: str, query: str, headers: List[str], rows: List[List]
 ) -> Dict[str, Any]:
     """Classify chart type using Pharia chart-classifier skill."""
     logger.info("Tool classify_chart_type called")
-    logger.debug(f"Analyzing {len(rows)} rows with {len(headers)} columns: {headers}")
+    logger.debug(
+        "Analyzing {} rows with {} columns: {}", len(rows), len(headers), headers
+    )
 
     try:
-        skill = Skill(namespace="playground", name="chart_classifier")
         response = await kernel.run(
-            skill, token, {"query": query, "headers": headers, "rows": rows}
+            _CHART_CLASSIFIER_SKILL,
+            token,
+            chart_classifier_input(query, headers, rows),
         )
 
         chart_type = response.get("chart_type", "bar")
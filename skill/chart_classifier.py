@@ -1,7 +1,6 @@
 import json
+import re
 
-from colorama import Style
-from jinja2 import Template
 from pharia_skill import ChatParams, Csi, Message, skill
 from pydantic import BaseModel
 
@@ -33,18 +32,26 @@ You must respond with ONLY ONE of these exact values: bar, line, pie, scatter, h
 Do not include any explanations, just the chart type.
 """
 
-USER_PROMPT_TEMPLATE = """
-SQL Query: {{ query }}
 
-Data Headers: {{ headers_json }}
-Sample Data (first few rows): {{ sample_data_json }}
-Total Rows: {{ total_rows }}
+def _build_user_prompt(
+    query: str,
+    headers_json: str,
+    sample_data_json: str,
+    total_rows: int,
+    num_columns: int,
+) -> str:
+    return f"""
+SQL Query: {query}
+
+Data Headers: {headers_json}
+Sample Data (first few rows): {sample_data_json}
+Total Rows: {total_rows}
 
 Analyze this data and determine the most appropriate chart type.
 
 Data Analysis:
-- Number of columns: {{ num_columns }}
-- Column names: {{ headers_json }}
+- Number of columns: {num_columns}
+- Column names: {headers_json}
 - Data types observed: Inspect the sample data to determine which columns are categorical (text) and which are numeric
 
 KEY OBSERVATIONS:
@@ -59,10 +66,16 @@ Respond with only one word: bar, line, pie, scatter, or histogram
 """
 
 
+_CHART_TYPES = frozenset({"bar", "line", "pie", "scatter", "histogram"})
+_CHART_TYPE_RE = re.compile(r"\b(bar|line|pie|scatter|histogram)\b")
+
+
 class Input(BaseModel):
     query: str
     headers: list[str]
     rows: list[list]
+    # Size of the full result when only a sample is sent in rows
+    total_rows: int | None = None
 
 
 class Output(BaseModel):
@@ -74,16 +87,17 @@ def classify_chart_type(csi: Csi, input: Input) -> Output:
     sample_data = input.rows[:5] if input.rows else []
     num_columns = len(input.headers)
 
-    # Pre-serialize complex data to avoid Jinja2 template parsing issues
     headers_json = json.dumps(input.headers)
     sample_data_json = json.dumps(sample_data)
 
     formatted_system_prompt = SYSTEM_PROMPT
-    formatted_user_prompt = Template(USER_PROMPT_TEMPLATE).render(
+    formatted_user_prompt = _build_user_prompt(
         query=input.query,
         headers_json=headers_json,
         sample_data_json=sample_data_json,
-        total_rows=len(input.rows),
+        total_rows=(
+            input.total_rows if input.total_rows is not None else len(input.rows)
+        ),
         num_columns=num_columns,
     )
 
@@ -98,13 +112,7 @@ def classify_chart_type(csi: Csi, input: Input) -> Output:
         response = csi.chat("qwen3-30b-a3b-thinking-2507-fp8", messages, params)
         chart_type = extract_chart_type(response.message.content.strip())
 
-        if not chart_type or chart_type not in [
-            "bar",
-            "line",
-            "pie",
-            "scatter",
-            "histogram",
-        ]:
+        if chart_type not in _CHART_TYPES:
             print(
                 f"Warning: Invalid or missing chart type '{chart_type}', defaulting to 'bar'"
             )
@@ -122,20 +130,20 @@ def extract_chart_type(response_text: str) -> str:
     if "</think>" in response_text:
         response_text = response_text.split("</think>", 1)[1].strip()
 
-    response_text = response_text.lower().strip()
-
-    valid_types = ["bar", "line", "pie", "scatter", "histogram"]
-    for chart_type in valid_types:
-        if chart_type in response_text:
-            return chart_type
+    response_text = response_text.lower()
+    words = response_text.split(None, 1)
+    if not words:
+        return ""
 
-    return response_text.split()[0] if response_text.split() else ""
+    # Well-behaved responses are exactly the chart type
+    if words[0] in _CHART_TYPES:
+        return words[0]
 
+    match = _CHART_TYPE_RE.search(response_text)
+    if match:
+        return match.group(1)
 
-def print_colored_prompt(prompt_type: str, content: str, color: str):
-    print(f"{color}{prompt_type}:{Style.RESET_ALL}")
-    print(f"{color}{content}{Style.RESET_ALL}")
-    print("\n")
+    return words[0]
 
 
 if __name__ == "__main__":
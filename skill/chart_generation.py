@@ -2,6 +2,15 @@ import re
 
 from pydantic import BaseModel
 
+_HUE_RE = re.compile(r",?\s*hue\s*=\s*['\"]?\w+['\"]?")
+_BY_RE = re.compile(r",?\s*by\s*=\s*['\"]?\w+['\"]?")
+_COLOR_RE = re.compile(r",?\s*color\s*=\s*['\"][^'\"]+['\"]")
+# The service renders and closes figures itself
+_DROPPED_CALLS = ("plt.show(", "plt.savefig(", "plt.close(")
+# Code containing none of these needs no line-by-line cleanup
+_CLEANUP_TRIGGERS = (*_DROPPED_CALLS, "hue=", "by=", "color=")
+
+
 class Input(BaseModel):
     chart_type: str
     query: str
@@ -12,33 +21,42 @@ class Input(BaseModel):
 class Output(BaseModel):
     chart_code: str | None = None
 
+
 def extract_python_code(response_text: str) -> str:
     """Extract Python code from the response, removing all thinking tags and content."""
     if "</think>" in response_text:
         response_text = response_text.split("</think>", 1)[1].strip()
 
     code = response_text.strip()
-    lines = code.split("\n")
+    if not any(trigger in code for trigger in _CLEANUP_TRIGGERS):
+        return code
+
+    has_for_plot = "for " in code and "plt.plot(" in code
+    modified = False
     filtered_lines = []
-    for line in lines:
-        stripped = line.strip()
-        if (
-            not stripped.startswith("plt.show()")
-            and not stripped.startswith("plt.savefig(")
-            and not stripped.startswith("plt.close()")
+    for original_line in code.splitlines():
+        if "plt." in original_line and original_line.lstrip().startswith(
+            _DROPPED_CALLS
         ):
+            modified = True
+            continue
+
+        line = original_line
 
+        # All rewrites below remove keyword arguments
+        if "=" in line:
             if "hue=" in line:
-                line = re.sub(r",?\s*hue\s*=\s*['\"]?\w+['\"]?", "", line)
+                line = _HUE_RE.sub("", line)
             if "by=" in line and ".plot." in line:
-                line = re.sub(r",?\s*by\s*=\s*['\"]?\w+['\"]?", "", line)
+                line = _BY_RE.sub("", line)
             # Remove hardcoded color in loop-based plots (let matplotlib use default color cycle)
-            if "for " in code and "plt.plot(" in line and "color=" in line:
-                line = re.sub(r",?\s*color\s*=\s*['\"][^'\"]+['\"]", "", line)
+            if has_for_plot and "plt.plot(" in line and "color=" in line:
+                line = _COLOR_RE.sub("", line)
 
-            filtered_lines.append(line)
+        modified = modified or line != original_line
+        filtered_lines.append(line)
 
-    return "\n".join(filtered_lines)
+    return "\n".join(filtered_lines) if modified else code
 
 
 if __name__ == "__main__":
@@ -2,6 +2,8 @@ import re
 
 from pydantic import BaseModel
 
+_THINK_RE = re.compile(r"<think>.*?</think>", re.DOTALL)
+_SELECT_LINE_RE = re.compile(r"^[^\S\n]*select", re.IGNORECASE | re.MULTILINE)
 
 
 class Input(BaseModel):
@@ -15,35 +17,30 @@ class Output(BaseModel):
 
 
 def extract_sql_text(sql_text: str) -> str:
-    sql_text_cleaned = re.sub(r"<think>(.*?)</think>", "", sql_text, flags=re.DOTALL)
-    lines = [
-        line.strip() for line in sql_text_cleaned.strip().split("\n") if line.strip()
-    ]
-
-    for i in range(len(lines) - 1, -1, -1):
-        line = lines[i]
-
-        if line.upper().startswith("SELECT"):
-            sql_lines = [line]
-
-            for j in range(i + 1, len(lines)):
-                next_line = lines[j]
-                if (
-                    next_line.upper().startswith("SELECT")
-                    or next_line.startswith("//")
-                    or next_line.startswith("#")
-                ):
-                    break
-                sql_lines.append(next_line)
-                if next_line.endswith(";"):
-                    break
-
-            sql_query = " ".join(sql_lines).rstrip(".")
-            if not sql_query.endswith(";"):
-                sql_query += ";"
-            return sql_query
-
-    return sql_text_cleaned.strip()
+    sql_text_cleaned = _THINK_RE.sub("", sql_text).strip()
+
+    # The answer is the last statement, so start at the last line opening a SELECT
+    last_select = None
+    for last_select in _SELECT_LINE_RE.finditer(sql_text_cleaned):
+        pass
+    if last_select is None:
+        return sql_text_cleaned
+
+    tail = sql_text_cleaned[last_select.start() :]
+    lines = [stripped for line in tail.splitlines() if (stripped := line.strip())]
+
+    sql_lines = [lines[0]]
+    for next_line in lines[1:]:
+        if next_line.startswith("//") or next_line.startswith("#"):
+            break
+        sql_lines.append(next_line)
+        if next_line.endswith(";"):
+            break
+
+    sql_query = " ".join(sql_lines).rstrip(".")
+    if not sql_query.endswith(";"):
+        sql_query += ";"
+    return sql_query
 
 
 if __name__ == "__main__":
@@ -1,4 +1,5 @@
 import json
+import re
 
 from pharia_skill import ChatParams, Csi, Message, skill
 from pydantic import BaseModel
@@ -36,6 +37,21 @@ PARAMETER REQUIREMENTS:
 Respond with ONLY the JSON object. No explanations.
 """
 
+_SYSTEM_MESSAGE = Message.system(content=SYSTEM_PROMPT)
+_JSON_DECODER = json.JSONDecoder()
+
+# The router only needs the gist of the context, not the full query or schema
+_QUERY_PREVIEW_CHARS = 100
+_HEADERS_PREVIEW_COUNT = 10
+
+# Only questions about the chart type need the LLM; everything else is
+# decided by the routing rules on the context alone
+_CHART_TYPE_QUESTION_RE = re.compile(
+    r"\bchart[ -]?types?\b"
+    r"|\b(?:which|what|best)\s+(?:kind\s+of\s+|type\s+of\s+)?charts?\b",
+    re.IGNORECASE,
+)
+
 
 class Input(BaseModel):
     message: str
@@ -56,17 +72,25 @@ def route_tool(csi: Csi, input: Input) -> Output:
         tool: Name of tool to call
         arguments: Arguments to pass to the tool
     """
+    if not _CHART_TYPE_QUESTION_RE.search(input.message):
+        return _route_by_context(input)
+
     context_parts = []
     if input.context:
         if input.context.get("query"):
             query = input.context["query"]
-            context_parts.append(f"SQL query available: {query[:100]}...")
+            if len(query) > _QUERY_PREVIEW_CHARS:
+                query = f"{query[:_QUERY_PREVIEW_CHARS]}..."
+            context_parts.append(f"SQL query available: {query}")
 
         if input.context.get("headers") and input.context.get("rows"):
             headers = input.context["headers"]
             rows = input.context["rows"]
+            columns = ", ".join(map(str, headers[:_HEADERS_PREVIEW_COUNT]))
+            if len(headers) > _HEADERS_PREVIEW_COUNT:
+                columns += f" (+{len(headers) - _HEADERS_PREVIEW_COUNT} more)"
             context_parts.append(
-                f"Data available: {len(rows)} rows, columns: {headers}"
+                f"Data available: {len(rows)} rows, columns: {columns}"
             )
 
     context_desc = "\n".join(context_parts) if context_parts else "No context provided"
@@ -80,7 +104,7 @@ Which tool should be called? Respond with JSON only.
 """
 
     messages = [
-        Message.system(content=SYSTEM_PROMPT),
+        _SYSTEM_MESSAGE,
         Message.user(content=user_prompt),
     ]
 
@@ -94,55 +118,52 @@ Which tool should be called? Respond with JSON only.
         llm_response = llm_response.split("</think>", 1)[1].strip()
 
     start = llm_response.find("{")
+    decision = None
     if start != -1:
-        brace_count = 0
-        for i in range(start, len(llm_response)):
-            if llm_response[i] == "{":
-                brace_count += 1
-            elif llm_response[i] == "}":
-                brace_count -= 1
-                if brace_count == 0:
-                    json_str = llm_response[start : i + 1]
-                    try:
-                        decision = json.loads(json_str)
-
-                        tool = decision.get("tool", "")
-                        arguments = decision.get("arguments", {})
-
-                        if tool == "generate_chart":
-                            if input.context:
-                                arguments["query"] = input.context.get("query", "")
-                                arguments["headers"] = input.context.get("headers", [])
-                                arguments["rows"] = input.context.get("rows", [])
-                            else:
-                                arguments.setdefault("query", "")
-                                arguments.setdefault("headers", [])
-                                arguments.setdefault("rows", [])
-                        elif tool == "execute_sql":
-                            if "query" not in arguments:
-                                arguments["query"] = (
-                                    input.context.get("query", "")
-                                    if input.context
-                                    else ""
-                                )
-                        elif tool == "generate_sql":
-                            if "question" not in arguments:
-                                arguments["question"] = input.message
-                        elif tool == "classify_chart_type":
-                            if input.context:
-                                arguments["query"] = input.context.get("query", "")
-                                arguments["headers"] = input.context.get("headers", [])
-                                arguments["rows"] = input.context.get("rows", [])
-                            else:
-                                arguments.setdefault("query", "")
-                                arguments.setdefault("headers", [])
-                                arguments.setdefault("rows", [])
-
-                        return Output(tool=tool, arguments=arguments)
-
-                    except json.JSONDecodeError:
-                        pass
-    print(f"Warning: Could not parse tool decision from LLM, using fallback")
+        try:
+            decision, _ = _JSON_DECODER.raw_decode(llm_response, start)
+        except json.JSONDecodeError:
+            pass
+
+    if isinstance(decision, dict):
+        tool = decision.get("tool", "")
+        arguments = decision.get("arguments", {})
+
+        if tool == "generate_chart":
+            if input.context:
+                arguments["query"] = input.context.get("query", "")
+                arguments["headers"] = input.context.get("headers", [])
+                arguments["rows"] = input.context.get("rows", [])
+            else:
+                arguments.setdefault("query", "")
+                arguments.setdefault("headers", [])
+                arguments.setdefault("rows", [])
+        elif tool == "execute_sql":
+            if "query" not in arguments:
+                arguments["query"] = (
+                    input.context.get("query", "") if input.context else ""
+                )
+        elif tool == "generate_sql":
+            if "question" not in arguments:
+                arguments["question"] = input.message
+        elif tool == "classify_chart_type":
+            if input.context:
+                arguments["query"] = input.context.get("query", "")
+                arguments["headers"] = input.context.get("headers", [])
+                arguments["rows"] = input.context.get("rows", [])
+            else:
+                arguments.setdefault("query", "")
+                arguments.setdefault("headers", [])
+                arguments.setdefault("rows", [])
+
+        return Output(tool=tool, arguments=arguments)
+
+    print("Warning: Could not parse tool decision from LLM, using fallback")
+    return _route_by_context(input)
+
+
+def _route_by_context(input: Input) -> Output:
+    """Apply the routing rules, which only depend on what the context holds."""
     if (
         input.context
         and input.context.get("query")